@@ -5,6 +5,10 @@ Compress audio files with quality presets for voice or music
 """
 
 import argparse
+import contextlib
+import functools
+import hashlib
+import io
 import json
 import math
 import os
@@ -12,10 +16,32 @@ import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from tqdm import tqdm
+    TQDM_AVAILABLE = True
+except ImportError:
+    TQDM_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# orjson parses large ffprobe dumps several times faster; both raise ValueError subclasses
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+CODEC_EXTS = {"opus": ".opus", "aac": ".m4a", "mp3": ".mp3"}
 
 AUDIO_EXTS = {".wav", ".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus", ".wma", ".aiff", ".aif", ".aifc", ".caf"}
+_AUDIO_EXTS_NODOT = {ext[1:] for ext in AUDIO_EXTS}
 
 # Presets configuration
 PRESETS = {
@@ -27,6 +53,8 @@ PRESETS = {
         'lufs': -16.0,
         'highpass': 80,
         'lowpass': 12000,
+        'normalizer': 'dynaudnorm',
+        'opus_application': 'voip',
         'description': 'Voice optimized - mono, 32kbps Opus (~70-90% smaller)'
     },
     'music': {
@@ -37,6 +65,8 @@ PRESETS = {
         'lufs': -14.0,
         'highpass': None,
         'lowpass': None,
+        'normalizer': 'loudnorm',
+        'opus_application': 'audio',
         'description': 'Music quality - stereo, 80kbps Opus (~40-60% smaller)'
     },
     'podcast': {
@@ -47,37 +77,156 @@ PRESETS = {
         'lufs': -16.0,
         'highpass': 60,
         'lowpass': 15000,
+        'normalizer': 'loudnorm',
+        'opus_application': 'voip',
         'description': 'Podcast - mono, 64kbps Opus (~50-75% smaller)'
     }
 }
 
 DEFAULT_PRESET = 'voice'
 
+# Tool paths; require_ffmpeg() swaps in absolute paths
+FFMPEG = "ffmpeg"
+FFPROBE = "ffprobe"
+
+# Files are encoded in parallel, one ffmpeg per core, so keep each ffmpeg single-threaded
+FFMPEG_THREAD_ARGS = ["-threads", "1", "-filter_threads", "1", "-filter_complex_threads", "1"]
+
+# Cheap single-pass dynamic normalizer, used instead of loudnorm when LUFS accuracy isn't needed
+DYNAUDNORM_FILTER = "dynaudnorm=f=250:g=15:p=0.95:m=10:s=12"
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "tinyaudio"
+PROBE_CACHE_FILE = CACHE_DIR / "probe.json"
+ENCODE_CACHE_FILE = CACHE_DIR / "encodes.json"
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB")
+_SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([KMG]?B)?\s*$", re.IGNORECASE)
+_BITRATE_RE = re.compile(r"^\s*(\d+)\s*[kK]?\s*$")
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+# Above this length, --st finds edge silence with a silencedetect pass and cuts it by seeking
+SILENCEDETECT_MIN_SECONDS = 300
+
 
 # ----------------------------- Helpers -----------------------------
 
 def require_ffmpeg() -> None:
-    """Check if FFmpeg is installed"""
+    """Check if FFmpeg is installed and remember where, so later runs skip the PATH lookup"""
+    global FFMPEG, FFPROBE
+    found = {}
     for binname in ("ffmpeg", "ffprobe"):
-        if shutil.which(binname) is None:
+        found[binname] = shutil.which(binname)
+        if found[binname] is None:
             print(f"ERROR: '{binname}' not found in PATH!")
             print("\nTo install FFmpeg:")
             print("  Windows: winget install ffmpeg")
             print("  macOS:   brew install ffmpeg")
             print("  Linux:   sudo apt install ffmpeg")
             sys.exit(1)
+    FFMPEG, FFPROBE = found["ffmpeg"], found["ffprobe"]
+
 
+def _init_worker(ffmpeg: str, ffprobe: str) -> None:
+    """Pool initializer: reuse the tool paths resolved by the parent process"""
+    global FFMPEG, FFPROBE
+    FFMPEG, FFPROBE = ffmpeg, ffprobe
 
-def run_cmd(cmd: List[str]) -> Tuple[int, str, str]:
-    """Run a command and return exit code, stdout, stderr"""
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on (respects affinity and cgroup cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on Windows/macOS
+        return os.cpu_count() or 1
+
+
+def run_cmd(cmd: List[str], capture: bool = False) -> Tuple[int, str, str]:
+    """
+    Run a command and return exit code, stdout, stderr.
+    stdout is discarded unless capture is set; stderr is only decoded on failure.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        bufsize=1 << 20,
+    )
     out, err = proc.communicate()
-    return proc.returncode, out, err
+    out_text = out.decode("utf-8", "replace") if out else ""
+    err_text = err.decode("utf-8", "replace") if err and (capture or proc.returncode != 0) else ""
+    return proc.returncode, out_text, err_text
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    duration_sec: float,
+    stall_timeout: float = 0,
+    label: Optional[str] = None
+) -> Tuple[int, str, Optional[int]]:
+    """
+    Run an ffmpeg encode that writes -progress to stdout.
+    Returns exit code, stderr and the final output size from the last progress report
+    (None if ffmpeg didn't finish reporting).
+    ffmpeg is killed if it reports nothing for stall_timeout seconds (0 disables this).
+    A progress bar named label is shown on stderr when tqdm is available.
+    """
+    with tempfile.TemporaryFile() as errf:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=errf)
+        
+        last_report = time.monotonic()
+        stalled = threading.Event()
+        finished = threading.Event()
+        
+        def watchdog():
+            while not finished.wait(1.0):
+                if time.monotonic() - last_report > stall_timeout:
+                    stalled.set()
+                    proc.kill()
+                    return
+        
+        if stall_timeout > 0:
+            threading.Thread(target=watchdog, daemon=True).start()
+        
+        bar = None
+        if label and TQDM_AVAILABLE:
+            bar = tqdm(total=round(duration_sec, 1), desc=label, unit="s", leave=False)
+        
+        total_size = None
+        final_size = None
+        try:
+            for line in proc.stdout:
+                # Any report counts as liveness: out_time legitimately stands still
+                # while silenceremove or loudnorm's lookahead is swallowing input
+                last_report = time.monotonic()
+                key, _, value = line.strip().partition(b"=")
+                if bar is not None and key in (b"out_time_us", b"out_time_ms") and value.isdigit():
+                    # Both keys are in microseconds (out_time_ms is misnamed)
+                    bar.n = min(int(value) / 1_000_000, bar.total)
+                    bar.refresh()
+                elif key == b"total_size":
+                    total_size = int(value) if value.isdigit() else None
+                elif key == b"progress" and value == b"end":
+                    # The closing report comes after the trailer is written
+                    final_size = total_size
+            proc.wait()
+        finally:
+            finished.set()
+            if bar is not None:
+                bar.close()
+        
+        if stalled.is_set():
+            return proc.returncode or 1, f"no progress for {stall_timeout:g}s, encode aborted", None
+        if proc.returncode != 0:
+            errf.seek(0)
+            return proc.returncode, errf.read().decode("utf-8", "replace"), None
+        return 0, "", final_size
 
 
 def human_to_bytes(s: str) -> int:
     """Convert strings like '2.5MB', '900KB' to bytes"""
-    m = re.match(r"^\s*([\d.]+)\s*([KMG]?B)?\s*$", s, re.IGNORECASE)
+    m = _SIZE_RE.match(s)
     if not m:
         raise ValueError(f"Could not parse size: {s}")
     val = float(m.group(1))
@@ -90,52 +239,168 @@ def human_to_bytes(s: str) -> int:
 
 def bytes_to_human(n: int) -> str:
     """Format bytes to human readable size"""
-    for unit in ("B", "KB", "MB", "GB"):
-        if n < 1024 or unit == "GB":
-            return f"{n:.1f}{unit}" if unit != "B" else f"{n}B"
-        n /= 1024
-    return f"{n:.1f}GB"
+    n = int(n)
+    # Unit index straight from the bit length (exact integer log2), capped at GB
+    i = min((max(n, 1).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    if i == 0:
+        return f"{n}B"
+    return f"{n / (1 << (10 * i)):.1f}{_SIZE_UNITS[i]}"
 
 
-def ffprobe_duration(path: Path) -> float:
-    """Get audio file duration using ffprobe"""
+def ffprobe_info(path: Path) -> dict:
+    """
+    Get duration and basic codec parameters of the first audio stream using ffprobe.
+    Returns a dict with duration, codec_name, sample_rate, channels and bit_rate
+    (the last four may be None when ffprobe can't tell).
+    """
+    # Ask only for what we use; full format/stream dumps can be huge for tagged files
     cmd = [
-        "ffprobe", "-v", "error",
-        "-print_format", "json",
-        "-show_format",
-        "-show_streams",
+        FFPROBE, "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries",
+        "format=duration,bit_rate:stream=duration,codec_name,sample_rate,channels,bit_rate",
+        "-of", "json",
         str(path)
     ]
-    code, out, err = run_cmd(cmd)
+    code, out, err = run_cmd(cmd, capture=True)
     if code != 0:
         raise RuntimeError(f"ffprobe failed for {path}: {err.strip()}")
     
-    info = json.loads(out or "{}")
+    info = json_loads(out or "{}")
+    fmt = info.get("format", {})
+    streams = info.get("streams", [])
+    stream = streams[0] if streams else {}
     
-    # Prefer format.duration; fallback to first audio stream duration
+    # Prefer format.duration; fallback to the (first audio) stream duration
     dur = None
-    if "format" in info and "duration" in info["format"]:
-        dur = float(info["format"]["duration"])
-    else:
-        for s in info.get("streams", []):
-            if s.get("codec_type") == "audio" and "duration" in s:
-                dur = float(s["duration"])
-                break
+    if "duration" in fmt:
+        dur = float(fmt["duration"])
+    elif "duration" in stream:
+        dur = float(stream["duration"])
     
     if dur is None or not math.isfinite(dur):
         raise RuntimeError(f"Could not determine duration for {path}")
     
-    return dur
+    def as_int(value) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    
+    return {
+        "duration": dur,
+        "codec_name": stream.get("codec_name"),
+        "sample_rate": as_int(stream.get("sample_rate")),
+        "channels": as_int(stream.get("channels")),
+        # Ogg streams usually carry no per-stream bit_rate; the container's is close enough
+        "bit_rate": as_int(stream.get("bit_rate")) or as_int(fmt.get("bit_rate")),
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def _probe_cached(path_str: str, size: int, mtime: int) -> dict:
+    """Memoized ffprobe_info; size and mtime only invalidate the key"""
+    return ffprobe_info(Path(path_str))
+
+
+def _probe_key(path: Path) -> Tuple[str, int, int]:
+    """Cache key for a file: (absolute path, size, mtime in ns)"""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+def probe_file(path: Path) -> dict:
+    """Get ffprobe_info for a file, reusing earlier probes of an unchanged file"""
+    return _probe_cached(*_probe_key(path))
+
 
+def _probe_one(path: Path) -> Optional[dict]:
+    """Worker-side probe; failures are left for compress_audio to report"""
+    try:
+        return probe_file(path)
+    except Exception:
+        return None
+
+
+def load_cache(path: Path) -> dict:
+    """Load a persisted cache, ignoring a missing or corrupt cache file"""
+    try:
+        with open(path, "rb") as f:
+            cache = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(path: Path, cache: dict) -> None:
+    """
+    Persist a cache; caches are best-effort, so errors are ignored.
+    Entries for inputs that no longer exist are dropped so the file does not grow forever.
+    """
+    cache = {key: entry for key, entry in cache.items() if os.path.exists(key)}
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def probe_many(paths: Iterable[Path], mapper: Callable = map, use_cache: bool = True) -> Dict[Path, dict]:
+    """
+    Get ffprobe_info for many files at once.
+    Files unchanged since a previous run are served from the on-disk cache;
+    the rest are probed through mapper (e.g. a process pool's map).
+    """
+    cache = load_cache(PROBE_CACHE_FILE) if use_cache else {}
+    results: Dict[Path, dict] = {}
+    missing: List[Tuple[Path, Tuple[str, int, int]]] = []
+
+    for path in paths:
+        try:
+            key = _probe_key(path)
+        except OSError:
+            continue
+        entry = cache.get(key[0])
+        if entry and entry.get("size") == key[1] and entry.get("mtime") == key[2] and "info" in entry:
+            results[path] = entry["info"]
+        else:
+            missing.append((path, key))
+
+    if missing:
+        for (path, key), info in zip(missing, mapper(_probe_one, [p for p, _ in missing])):
+            if info is None:
+                continue
+            results[path] = info
+            cache[key[0]] = {"size": key[1], "mtime": key[2], "info": info}
+        if use_cache:
+            save_cache(PROBE_CACHE_FILE, cache)
+
+    return results
+
+
+def _overhead_bytes(codec: str, duration_sec: float) -> int:
+    """Estimate container overhead (bytes) on top of the raw audio payload"""
+    if codec == "opus":
+        # Ogg: ~1 page/s (27-byte header + up to 255 lacing values), plus OpusHead/OpusTags
+        return int(duration_sec * (27 + 255)) + 1024
+    if codec == "aac":
+        # MP4: moov atom plus a sample-table entry per AAC frame
+        return int(duration_sec * 200) + 8 * 1024
+    # MP3: ID3 tag and Xing/LAME info frame
+    return 2 * 1024
 
-def compute_bitrate_for_target_size(target_bytes: int, duration_sec: float) -> int:
+
+def compute_bitrate_for_target_size(target_bytes: int, duration_sec: float, codec: str = "opus") -> int:
     """
     Compute target audio bitrate (bps) to approximately hit target_bytes.
-    Apply 3% overhead cushion for container/headers.
+    Container overhead for the codec is subtracted first.
     """
     if duration_sec <= 0:
         raise ValueError("Duration must be positive")
-    bits_available = target_bytes * 8 * 0.97
+    bits_available = max(0, (target_bytes - _overhead_bytes(codec, duration_sec)) * 8)
     br = int(bits_available / duration_sec)
     # Keep within reasonable bounds
     return max(6000, min(br, 512000))  # 6 kbps .. 512 kbps
@@ -143,27 +408,43 @@ def compute_bitrate_for_target_size(target_bytes: int, duration_sec: float) -> i
 
 def normalize_ext_for_codec(codec: str) -> str:
     """Get file extension for codec"""
-    if codec == "opus":
-        return ".opus"
-    elif codec == "aac":
-        return ".m4a"
-    elif codec == "mp3":
-        return ".mp3"
-    else:
-        return ".m4a"
+    return CODEC_EXTS.get(codec, ".m4a")
 
 
 # ----------------------------- Processing -----------------------------
 
-def build_filterchain(args, preset_config) -> str:
-    """Build FFmpeg audio filter chain"""
+def _use_dynaudnorm(args, preset_config) -> bool:
+    """Whether loudness normalization should use dynaudnorm instead of loudnorm"""
+    # An explicit --lufs or --accurate-lufs asks for a real target, which only loudnorm gives
+    if args.accurate_lufs:
+        return False
+    return args.fast or (args.lufs is None and preset_config.get("normalizer") == "dynaudnorm")
+
+
+def _silence_params(args) -> Tuple[float, float]:
+    """Silence threshold (dB) and minimum duration (s) for trimming"""
+    # More aggressive defaults for voice
+    thr = args.sth if args.sth is not None else (-50 if args.preset == "voice" else -45)
+    dur = args.sd if args.sd is not None else (0.5 if args.preset == "voice" else 0.8)
+    return thr, dur
+
+
+def build_filterchain(
+    args,
+    preset_config,
+    measured: Optional[dict] = None,
+    seek_trimmed: bool = False
+) -> str:
+    """
+    Build FFmpeg audio filter chain.
+    measured holds first-pass loudnorm stats (see measure_loudness) for a linear second pass.
+    seek_trimmed drops silenceremove when edge silence is already cut by seeking.
+    """
     filters = []
 
     # Silence trim (start & end)
-    if args.st:
-        # More aggressive defaults for voice
-        thr = args.sth if args.sth is not None else (-50 if args.preset == "voice" else -45)
-        dur = args.sd if args.sd is not None else (0.5 if args.preset == "voice" else 0.8)
+    if args.st and not seek_trimmed:
+        thr, dur = _silence_params(args)
         filters.append(
             f"silenceremove=start_periods=1:start_duration={dur}:start_threshold={thr}dB:"
             f"stop_periods=1:stop_duration={dur}:stop_threshold={thr}dB"
@@ -179,14 +460,110 @@ def build_filterchain(args, preset_config) -> str:
     if lp:
         filters.append(f"lowpass=f={lp}")
 
-    # Loudness normalization
+    # Loudness normalization (last, so it only sees what survived the trim)
     lufs = args.lufs if args.lufs is not None else preset_config.get("lufs")
     if lufs is not None:
-        filters.append(f"loudnorm=I={float(lufs)}:LRA=11:TP=-1.5")
+        if _use_dynaudnorm(args, preset_config):
+            filters.append(DYNAUDNORM_FILTER)
+        else:
+            loudnorm = f"loudnorm=I={float(lufs)}:LRA=11:TP=-1.5"
+            if measured:
+                loudnorm += (
+                    f":measured_I={measured['input_i']}:measured_LRA={measured['input_lra']}"
+                    f":measured_TP={measured['input_tp']}:measured_thresh={measured['input_thresh']}"
+                    f":offset={measured['target_offset']}:linear=true"
+                )
+            filters.append(loudnorm)
 
     return ",".join(filters) if filters else ""
 
 
+def _seek_args(seek: Optional[Tuple[float, Optional[float]]]) -> List[str]:
+    """Input options cutting to the (start, end) window found by detect_edge_silence"""
+    if not seek:
+        return []
+    start, end = seek
+    opts = ["-ss", f"{start:.3f}"] if start > 0 else []
+    if end is not None:
+        opts.extend(["-to", f"{end:.3f}"])
+    return opts
+
+
+def detect_edge_silence(
+    inp: Path,
+    threshold_db: float,
+    min_duration: float,
+    duration_sec: float
+) -> Optional[Tuple[float, Optional[float]]]:
+    """
+    Find leading/trailing silence with a decode-only silencedetect pass.
+    Returns (start, end) of the audio to keep (end None = until EOF), or None on failure.
+    """
+    cmd = [
+        FFMPEG, "-nostdin", "-hide_banner", "-nostats", *FFMPEG_THREAD_ARGS, "-i", str(inp),
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-af", f"silencedetect=n={threshold_db}dB:d={min_duration}",
+        "-f", "null", "-"
+    ]
+    code, out, err = run_cmd(cmd, capture=True)
+    if code != 0:
+        return None
+    
+    # Pair up silence_start/silence_end events into regions; an open region runs to EOF
+    regions: List[List[Optional[float]]] = []
+    for kind, value in _SILENCE_RE.findall(err):
+        if kind == "start":
+            regions.append([float(value), None])
+        elif regions:
+            regions[-1][1] = float(value)
+    
+    eps = 0.05
+    start, end = 0.0, None
+    if regions and regions[0][0] <= eps and regions[0][1] is not None:
+        start = regions[0][1]
+    if regions and (regions[-1][1] is None or regions[-1][1] >= duration_sec - eps):
+        if regions[-1][0] > start:
+            end = regions[-1][0]
+    return start, end
+
+
+def measure_loudness(
+    inp: Path,
+    filterchain: str,
+    seek: Optional[Tuple[float, Optional[float]]] = None
+) -> Optional[dict]:
+    """
+    Run a decode-only loudnorm pass (no encode) and return its measured stats.
+    filterchain must end with loudnorm. Returns None if nothing usable was measured.
+    """
+    cmd = [
+        FFMPEG, "-nostdin", "-hide_banner", "-nostats", *FFMPEG_THREAD_ARGS,
+        *_seek_args(seek), "-i", str(inp),
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-af", f"{filterchain}:print_format=json",
+        "-f", "null", "-"
+    ]
+    code, out, err = run_cmd(cmd, capture=True)
+    if code != 0:
+        return None
+    
+    # loudnorm prints its stats as the last JSON object on stderr
+    start, end = err.rfind("{"), err.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        stats = json_loads(err[start:end + 1])
+        keys = ("input_i", "input_lra", "input_tp", "input_thresh", "target_offset")
+        measured = {k: float(stats[k]) for k in keys}
+    except (ValueError, KeyError):
+        return None
+    
+    # Digital silence measures as -inf, which loudnorm won't accept back
+    if not all(math.isfinite(v) for v in measured.values()):
+        return None
+    return measured
+
+
 def build_ffmpeg_cmd(
     inp: Path,
     out: Path,
@@ -194,20 +571,34 @@ def build_ffmpeg_cmd(
     bitrate_bps: int,
     samplerate: int,
     channels: int,
-    filterchain: str
+    filterchain: str,
+    opus_application: str = "audio",
+    seek: Optional[Tuple[float, Optional[float]]] = None
 ) -> List[str]:
     """Build FFmpeg command"""
-    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(inp)]
+    cmd = [
+        FFMPEG, "-y", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-progress", "pipe:1", "-nostats",
+        *FFMPEG_THREAD_ARGS,
+        *_seek_args(seek),
+        "-i", str(inp)
+    ]
+
+    # First audio stream only: never decode cover art, subtitles or data streams
+    cmd.extend(["-map", "0:a:0", "-vn", "-sn", "-dn"])
 
     if filterchain:
         cmd.extend(["-af", filterchain])
 
     # Channels & sample rate
-    cmd.extend(["-ac", str(channels), "-ar", str(samplerate)])
+    cmd.extend(["-ac", str(channels), "-ar", str(samplerate), "-threads", "1"])
 
     # Codec specifics
     if codec == "opus":
         cmd.extend(["-c:a", "libopus", "-b:a", f"{bitrate_bps}", "-vbr", "on", "-compression_level", "10"])
+        if opus_application == "voip":
+            # Speech mode with long frames: fewer packet headers, better quality per bit
+            cmd.extend(["-application", "voip", "-frame_duration", "60", "-packet_loss", "0", "-cutoff", "12000"])
     elif codec == "aac":
         cmd.extend(["-c:a", "aac", "-b:a", f"{bitrate_bps}"])
     elif codec == "mp3":
@@ -219,40 +610,147 @@ def build_ffmpeg_cmd(
     return cmd
 
 
-def compress_audio(input_path, output_path, preset_config, args):
-    """Compress a single audio file"""
-    if not os.path.exists(input_path):
+def _file_size(path) -> Optional[int]:
+    """Size of a file in bytes, or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _remove_quietly(path) -> None:
+    """Delete a (partial) output file if it exists"""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _needs_filters(probe: dict, args, codec: str, bitrate_bps: int, samplerate: int, channels: int) -> bool:
+    """
+    Whether a file needs the full filter + encode pipeline.
+    False for sources already in the target codec at about the target bitrate,
+    sample rate and channels, where filtering again would only burn CPU.
+    """
+    if args.force_filters:
+        return True
+    # Filters the user asked for explicitly always run
+    if args.st or args.hp is not None or args.lp is not None or args.lufs is not None:
+        return True
+    if args.fast or args.accurate_lufs:
+        return True
+    
+    if probe.get("codec_name") != codec:
+        return True
+    bit_rate = probe.get("bit_rate")
+    if not bit_rate or bit_rate > bitrate_bps * 1.1:
+        return True
+    # Opus always reports 48 kHz regardless of the encoder's input rate
+    if codec != "opus" and probe.get("sample_rate") != samplerate:
+        return True
+    if probe.get("channels") != channels:
+        return True
+    return False
+
+
+def build_remux_cmd(inp: Path, out: Path) -> List[str]:
+    """Build FFmpeg command copying the first audio stream into a new container"""
+    return [
+        FFMPEG, "-y", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", str(inp),
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-c:a", "copy",
+        str(out)
+    ]
+
+
+def compress_audio(input_path, output_path, preset_config, args, probe=None, encode_cache=None):
+    """
+    Compress a single audio file (input is probed if probe info isn't given).
+    encode_cache maps absolute input paths to their last encode; it is consulted to
+    skip unchanged work and updated in place on success. None disables it.
+    """
+    try:
+        original_size = os.stat(input_path).st_size
+    except FileNotFoundError:
         print(f"ERROR: File not found: {input_path}")
         return False
     
     try:
-        # Get duration
-        duration = ffprobe_duration(input_path)
-        original_size = os.path.getsize(input_path)
+        # Get duration and source codec parameters
+        if probe is None:
+            probe = probe_file(input_path)
+        duration = probe["duration"]
+        
+        codec = args.codec or preset_config["codec"]
         
         # Determine bitrate
         if args.ts:
-            bitrate_bps = compute_bitrate_for_target_size(args.ts, duration)
+            bitrate_bps = compute_bitrate_for_target_size(args.ts, duration, codec)
         elif args.b:
             # Parse bitrate like "32k" or "32"
-            m = re.match(r"^\s*(\d+)\s*[kK]?\s*$", args.b)
+            m = _BITRATE_RE.match(args.b)
             if not m:
                 raise ValueError(f"Invalid bitrate: {args.b}")
             bitrate_bps = int(m.group(1)) * 1000
         else:
             bitrate_bps = preset_config["bitrate_bps"]
         
+        # Get encoding parameters
+        samplerate = args.sr or preset_config["samplerate"]
+        channels = args.ch or preset_config["channels"]
+        
+        # Already compressed to these settings: remux instead of filtering and re-encoding
+        if not _needs_filters(probe, args, codec, bitrate_bps, samplerate, channels):
+            print(f"✓ {input_path}")
+            print(f"  Already {codec} at {int(probe['bit_rate']/1000)}kbps, "
+                  f"remuxing without re-encode (use --force-filters to re-encode)")
+            code, _, err = run_cmd(build_remux_cmd(input_path, output_path))
+            if code != 0:
+                print(f"✗ FFmpeg error: {err.strip()}")
+                _remove_quietly(output_path)
+                return False
+            actual_size = os.stat(output_path).st_size
+            print(f"  Actual: {bytes_to_human(actual_size)}")
+            return True
+        
         # Adjust lowpass for ultra-low bitrates
         if args.preset == "voice" and bitrate_bps <= 24000 and args.lp is None:
             args.lp = 8000
         
-        # Get encoding parameters
-        samplerate = args.sr or preset_config["samplerate"]
-        channels = args.ch or preset_config["channels"]
-        codec = args.codec or preset_config["codec"]
+        # Same input, same settings, output still in place: nothing to do
+        abspath, size, mtime = _probe_key(input_path)
+        recipe = [
+            str(output_path), codec, bitrate_bps, samplerate, channels,
+            build_filterchain(args, preset_config), preset_config.get("opus_application"),
+            args.accurate_lufs,
+        ]
+        recipe_hash = hashlib.sha1(json.dumps(recipe).encode("utf-8")).hexdigest()
+        if encode_cache is not None and not args.force:
+            entry = encode_cache.get(abspath)
+            if (entry and entry.get("size") == size and entry.get("mtime") == mtime
+                    and entry.get("recipe") == recipe_hash
+                    and _file_size(output_path) == entry.get("output_size")):
+                print(f"✓ {input_path}")
+                print(f"  Unchanged since last run, keeping {output_path} (use --force to re-encode)")
+                return True
+        
+        # Long files: locate edge silence in a decode-only pass and cut it by seeking,
+        # rather than running silenceremove over every sample inside the encode
+        seek = None
+        if args.st and duration > SILENCEDETECT_MIN_SECONDS:
+            seek = detect_edge_silence(input_path, *_silence_params(args), duration)
         
         # Build filter chain
-        filterchain = build_filterchain(args, preset_config)
+        filterchain = build_filterchain(args, preset_config, seek_trimmed=seek is not None)
+        
+        # Two-pass loudnorm: measure on decoded audio, then apply linearly during the encode
+        if args.accurate_lufs and "loudnorm=" in filterchain:
+            measured = measure_loudness(input_path, filterchain, seek)
+            if measured:
+                filterchain = build_filterchain(args, preset_config, measured, seek is not None)
+            else:
+                print("  Warning: loudness measurement failed, using single-pass loudnorm")
         
         # Estimate output size
         est_size = int(bitrate_bps * duration / 8)
@@ -270,51 +768,97 @@ def compress_audio(input_path, output_path, preset_config, args):
             bitrate_bps,
             samplerate,
             channels,
-            filterchain
+            filterchain,
+            preset_config.get("opus_application", "audio"),
+            seek
         )
         
-        code, out, err = run_cmd(cmd)
+        label = Path(input_path).name if args.progress else None
+        code, err, actual_size = run_ffmpeg(cmd, duration, args.stall_timeout, label)
         
         if code != 0:
             print(f"✗ FFmpeg error: {err.strip()}")
             # Clean up failed output
-            if os.path.exists(output_path):
-                os.remove(output_path)
+            _remove_quietly(output_path)
             return False
         
-        # Show actual result
-        if os.path.exists(output_path):
-            actual_size = os.path.getsize(output_path)
-            actual_reduction = ((original_size - actual_size) / original_size) * 100
-            print(f"  Actual: {bytes_to_human(actual_size)} ({actual_reduction:.1f}% smaller)")
-            return True
+        # Show actual result (size from ffmpeg's final report, else stat the file)
+        if actual_size is None:
+            try:
+                actual_size = os.stat(output_path).st_size
+            except FileNotFoundError:
+                return False
         
-        return False
+        if encode_cache is not None:
+            encode_cache[abspath] = {
+                "size": size, "mtime": mtime, "recipe": recipe_hash,
+                "output": str(output_path), "output_size": actual_size,
+            }
+        
+        actual_reduction = ((original_size - actual_size) / original_size) * 100
+        print(f"  Actual: {bytes_to_human(actual_size)} ({actual_reduction:.1f}% smaller)")
+        if args.ts and actual_size > args.ts * 1.02:
+            suggested = int(bitrate_bps * args.ts / actual_size / 1000)
+            print(f"  Hint: {bytes_to_human(actual_size - args.ts)} over target size, "
+                  f"try -b {suggested}k")
+        return True
         
     except Exception as e:
         print(f"✗ {input_path}")
         print(f"  Error: {str(e)}")
-        if os.path.exists(output_path):
-            try:
-                os.remove(output_path)
-            except:
-                pass
+        _remove_quietly(output_path)
         return False
 
 
+def _walk_audio(root: str) -> Iterator[str]:
+    """Yield audio file paths under root, using scandir's cached entry types"""
+    try:
+        it = os.scandir(root)
+    except OSError:
+        # Unreadable directory: skip it, as os.walk does
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_audio(entry.path)
+            else:
+                name = entry.name
+                if "." in name and name.rpartition(".")[2].lower() in _AUDIO_EXTS_NODOT:
+                    yield entry.path
+
+
 def collect_inputs(paths: List[Path]) -> List[Path]:
     """Find all audio files from given paths"""
     files: List[Path] = []
+    seen = set()
+    
+    def add(p: str) -> None:
+        key = os.path.abspath(p)
+        if key not in seen:
+            seen.add(key)
+            files.append(Path(p))
+    
     for p in paths:
         if p.is_file() and p.suffix.lower() in AUDIO_EXTS:
-            files.append(p)
+            add(os.fspath(p))
         elif p.is_dir():
-            for root, dirs, fs in os.walk(p):
-                for f in fs:
-                    ext = Path(f).suffix.lower()
-                    if ext in AUDIO_EXTS:
-                        files.append(Path(root) / f)
-    return sorted(set(files))
+            for f in _walk_audio(os.fspath(p)):
+                add(f)
+    return sorted(files, key=os.fspath)
+
+
+def _process_one(job) -> Tuple[bool, str, Optional[dict]]:
+    """
+    Compress one file in a worker process.
+    Returns (success, captured output, updated encode cache entries for this file).
+    """
+    input_path, output_path, preset_config, opts, probe, encode_cache = job
+    # Rebuild a private namespace: compress_audio may tweak args per file
+    args = argparse.Namespace(**opts)
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        ok = compress_audio(input_path, output_path, preset_config, args, probe, encode_cache)
+    return ok, buf.getvalue(), encode_cache
 
 
 # ----------------------------- CLI -----------------------------
@@ -334,6 +878,7 @@ Examples:
   python tinyaudio_cli.py audio.wav -ts 2.5MB
   python tinyaudio_cli.py recordings/ -p voice --st
   python tinyaudio_cli.py audio.wav -o output.opus
+  python tinyaudio_cli.py recordings/ -j 4
         """
     )
     
@@ -369,6 +914,13 @@ Examples:
     parser.add_argument('--lufs',
                         type=float,
                         help='Loudness target in LUFS (e.g., -16 for voice, -14 for music)')
+    norm_group = parser.add_mutually_exclusive_group()
+    norm_group.add_argument('--fast',
+                            action='store_true',
+                            help='Use fast dynaudnorm instead of loudnorm for loudness normalization')
+    norm_group.add_argument('--accurate-lufs',
+                            action='store_true',
+                            help='Measure loudness first, then normalize exactly to the LUFS target')
     parser.add_argument('--st', '--silence-trim',
                         action='store_true',
                         help='Trim silence at start/end')
@@ -385,6 +937,22 @@ Examples:
                         type=int,
                         help='Low-pass filter cutoff in Hz (e.g., 12000)')
     
+    parser.add_argument('--force-filters',
+                        action='store_true',
+                        help='Always filter and re-encode, even sources already at the target codec/bitrate')
+    parser.add_argument('--force',
+                        action='store_true',
+                        help='Re-encode files even if they are unchanged since the last run')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='Do not read or write the probe/encode caches in ~/.cache/tinyaudio')
+    parser.add_argument('--stall-timeout',
+                        type=float,
+                        default=60,
+                        help='Abort an encode after this many seconds without progress (default: 60, 0 = never)')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='Number of files to compress in parallel (default: available CPUs)')
     parser.add_argument('--list-presets',
                         action='store_true',
                         help='List all available presets and exit')
@@ -431,9 +999,14 @@ Examples:
     args.sr = args.samplerate
     args.ch = args.channels
     
-    # Determine output mode
+    # Determine output mode (everything here is the same for every file)
     single_file = len(audio_files) == 1
     output_is_dir = args.output and (Path(args.output).is_dir() or not single_file)
+    ext = normalize_ext_for_codec(args.codec or preset_config['codec'])
+    suffix = args.suffix or ''
+    output_dir = Path(args.output) if output_is_dir else None
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
     
     # Print summary
     print(f"\nCompressing {len(audio_files)} audio file(s)")
@@ -441,39 +1014,67 @@ Examples:
     print("-" * 70)
     print()
     
-    # Process files
-    success_count = 0
-    failed_count = 0
-    
+    # Work out every output path up front
+    targets = []
     for audio_file in audio_files:
         # Determine output path
         if single_file and args.output and not output_is_dir:
             # Single file with specific output name
             output_path = Path(args.output)
-        elif args.output and output_is_dir:
+        elif output_dir:
             # Output directory specified
-            output_dir = Path(args.output)
-            output_dir.mkdir(parents=True, exist_ok=True)
-            codec = args.codec or preset_config['codec']
-            ext = normalize_ext_for_codec(codec)
-            output_path = output_dir / (audio_file.stem + ext)
+            output_path = output_dir / f"{audio_file.stem}{ext}"
         else:
             # Same directory as input with new extension
-            codec = args.codec or preset_config['codec']
-            ext = normalize_ext_for_codec(codec)
-            suffix = args.suffix if args.suffix else ''
-            output_path = audio_file.parent / (audio_file.stem + suffix + ext)
+            output_path = audio_file.parent / f"{audio_file.stem}{suffix}{ext}"
         
         # Safety check: don't overwrite input file
         if output_path == audio_file:
-            output_path = audio_file.parent / (audio_file.stem + '-compressed' + audio_file.suffix)
+            output_path = audio_file.parent / f"{audio_file.stem}-compressed{audio_file.suffix}"
         
-        if compress_audio(audio_file, output_path, preset_config, args):
-            success_count += 1
-        else:
-            failed_count += 1
+        targets.append((audio_file, output_path))
+    
+    # Process files
+    success_count = 0
+    failed_count = 0
+    
+    workers = max(1, min(args.jobs or available_cpus(), len(targets)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(FFMPEG, FFPROBE)) as executor:
+        # Workers are only spawned on submit, so a lone file stays in-process
+        mapper = executor.map if workers > 1 else map
         
-        print()
+        # Probe all files first (cached across runs), then encode
+        probes = probe_many(audio_files, mapper, use_cache=not args.no_cache)
+        
+        # Each job only carries (and hands back) its own encode cache entry
+        encode_cache = None if args.no_cache else load_cache(ENCODE_CACHE_FILE)
+        
+        def cache_slice(audio_file: Path) -> Optional[dict]:
+            if encode_cache is None:
+                return None
+            key = os.path.abspath(audio_file)
+            return {key: encode_cache[key]} if key in encode_cache else {}
+        
+        # Progress bars only make sense when one encode at a time owns the terminal
+        args.progress = workers == 1 and sys.stderr.isatty()
+        opts = vars(args)
+        jobs = [(audio_file, output_path, preset_config, opts, probes.get(audio_file), cache_slice(audio_file))
+                for audio_file, output_path in targets]
+        
+        for ok, output, entries in mapper(_process_one, jobs):
+            print(output, end='')
+            if entries:
+                encode_cache.update(entries)
+            if ok:
+                success_count += 1
+            else:
+                failed_count += 1
+            
+            print()
+    
+    if encode_cache is not None:
+        save_cache(ENCODE_CACHE_FILE, encode_cache)
     
     # Print final summary
     print("-" * 70)
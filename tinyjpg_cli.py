@@ -5,42 +5,89 @@ Compress JPEG images with quality presets
 """
 
 import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
 import os
 import sys
 import shutil
+import stat
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from multiprocessing import freeze_support
 from pathlib import Path
+from typing import Optional
 
-try:
-    from PIL import Image
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
+# Pillow is imported on first use (see _pil_image) so the coordinator and
+# jpegtran-only workers never pay for it
+PILLOW_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+
+@dataclass(frozen=True, slots=True)
+class Preset:
+    """Compression preset; quality None means lossless (jpegtran)"""
+    quality: Optional[int]
+    description: str
 
 
 # Presets configuration
 PRESETS = {
-    'high': {
-        'quality': 90,
-        'description': 'High quality - minimal compression (~50-60% smaller)'
-    },
-    'balanced': {
-        'quality': 85,
-        'description': 'Balanced - good compression/quality ratio (~60-70% smaller)'
-    },
-    'maximum': {
-        'quality': 75,
-        'description': 'Maximum compression - aggressive (~70-80% smaller)'
-    },
-    'lossless': {
-        'quality': None,
-        'description': 'Lossless optimization - no quality loss (~5-10% smaller)'
-    }
+    'high': Preset(
+        quality=90,
+        description='High quality - minimal compression (~50-60% smaller)'
+    ),
+    'balanced': Preset(
+        quality=85,
+        description='Balanced - good compression/quality ratio (~60-70% smaller)'
+    ),
+    'maximum': Preset(
+        quality=75,
+        description='Maximum compression - aggressive (~70-80% smaller)'
+    ),
+    'lossless': Preset(
+        quality=None,
+        description='Lossless optimization - no quality loss (~5-10% smaller)'
+    )
 }
 
 DEFAULT_PRESET = 'balanced'
 
+# With --fast-highq, qualities at or above this skip the re-encode and go through jpegtran
+FAST_HIGHQ_THRESHOLD = 92
+
+# Files below --min-size are skipped; progressive files below this many times
+# --min-size are skipped for lossy presets as well, since re-encoding rarely helps
+DEFAULT_MIN_SIZE = 4096
+PROGRESSIVE_SKIP_FACTOR = 4
+
+# Lossy presets skip files whose estimated quality is at least this far below the target
+QUALITY_SKIP_MARGIN = 3
+
+# Standard (IJG, quality 50) luminance quantization table, used to estimate source quality
+STD_LUMINANCE_QTABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)
+
+# Progressive scan script shipped next to this file, used by --scans
+DEFAULT_SCANS_FILE = Path(__file__).parent / 'jpegtran_scans.txt'
+
+# Upper bound on files handed to a worker in one go, and the minimum number of
+# batches per worker so the pool can still balance load dynamically
+BATCH_SIZE = 32
+BATCHES_PER_WORKER = 4
 
+
+@lru_cache(maxsize=1)
 def find_cjpeg():
     """Find mozjpeg's cjpeg binary"""
     # Check system PATH
@@ -60,6 +107,7 @@ def find_cjpeg():
     return None
 
 
+@lru_cache(maxsize=1)
 def find_jpegtran():
     """Find jpegtran binary"""
     # Check system PATH
@@ -79,21 +127,143 @@ def find_jpegtran():
     return None
 
 
-def get_file_size(filepath):
-    """Get file size in bytes"""
-    return os.path.getsize(filepath)
+@lru_cache(maxsize=1)
+def _pil_image():
+    """Import Pillow's Image module on first use"""
+    from PIL import Image
+    return Image
+
+
+@lru_cache(maxsize=1)
+def available_tools():
+    """Return (cjpeg path, jpegtran path, Pillow available), looked up once per process"""
+    return find_cjpeg(), find_jpegtran(), PILLOW_AVAILABLE
+
+
+def read_jpeg_frame(filepath):
+    """
+    Read the start-of-frame marker without decoding the image.
+    Returns (SOF marker code, component count), or None if not found.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                code = marker[1]
+                if code == 0xFF:
+                    # Fill byte before the actual marker
+                    f.seek(-1, os.SEEK_CUR)
+                    continue
+                if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                    # Start of frame: length, precision, height, width, components
+                    header = f.read(8)
+                    if len(header) < 8:
+                        return None
+                    return code, header[7]
+                if code == 0xDA:
+                    # Start of scan reached without a frame header
+                    return None
+                length = int.from_bytes(f.read(2), 'big')
+                if length < 2:
+                    return None
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+def is_progressive_jpeg(filepath):
+    """Check the frame header for progressive coding without decoding the image"""
+    frame = read_jpeg_frame(filepath)
+    # SOF2/6/10/14 are the progressive variants
+    return frame is not None and frame[0] in (0xC2, 0xC6, 0xCA, 0xCE)
+
+
+def estimate_jpeg_quality(filepath):
+    """
+    Estimate the IJG quality (1-100) a JPEG was saved at from its luminance
+    quantization table, without decoding. Returns None if no table is found.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                code = marker[1]
+                if code == 0xFF:
+                    # Fill byte before the actual marker
+                    f.seek(-1, os.SEEK_CUR)
+                    continue
+                if code == 0xDA:
+                    # Start of scan reached without a luminance table
+                    return None
+                length = int.from_bytes(f.read(2), 'big')
+                if length < 2:
+                    return None
+                segment = f.read(length - 2)
+                if code != 0xDB:
+                    continue
+                
+                # A DQT segment may hold several tables: Pq/Tq byte, then 64 values
+                pos = 0
+                while pos < len(segment):
+                    precision, table_id = segment[pos] >> 4, segment[pos] & 0x0F
+                    size = 128 if precision else 64
+                    values = segment[pos + 1:pos + 1 + size]
+                    if len(values) < size:
+                        return None
+                    if table_id == 0:
+                        if precision:
+                            total = sum(int.from_bytes(values[i:i + 2], 'big')
+                                        for i in range(0, size, 2))
+                        else:
+                            total = sum(values)
+                        # Invert IJG scaling: table = std * scale / 100 (zigzag order doesn't matter for sums)
+                        scale = total * 100 / sum(STD_LUMINANCE_QTABLE)
+                        if scale <= 0:
+                            return None
+                        quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+                        return max(1, min(100, round(quality)))
+                    pos += 1 + size
+    except OSError:
+        return None
+
+
+UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 
 def format_size(bytes_size):
     """Format bytes to human readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.2f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.2f} TB"
+    # Unit index straight from the bit length (exact integer log2), capped at TB
+    i = min((max(int(bytes_size), 1).bit_length() - 1) // 10, len(UNITS) - 1)
+    return f"{bytes_size / (1 << (10 * i)):.2f} {UNITS[i]}"
+
+
+def _decode_rgb(img_or_path):
+    """Return an RGB Pillow image, decoding the file first if given a path"""
+    if isinstance(img_or_path, (str, os.PathLike)):
+        img = _pil_image().open(img_or_path)
+        img.load()
+    else:
+        img = img_or_path
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def _ppm_bytes(img):
+    """Serialize an RGB image as binary PPM straight from its pixel buffer"""
+    width, height = img.size
+    return f'P6\n{width} {height}\n255\n'.encode() + img.tobytes()
 
 
-def compress_jpeg_mozjpeg(input_path, output_path, quality):
+def compress_jpeg_mozjpeg(img_or_path, output_path, quality):
     """Compress JPEG using mozjpeg (via Pillow decode + cjpeg encode)"""
     if not PILLOW_AVAILABLE:
         return False, "Pillow required for mozjpeg compression"
@@ -102,49 +272,36 @@ def compress_jpeg_mozjpeg(input_path, output_path, quality):
     if not cjpeg:
         return False, "mozjpeg not found"
     
-    temp_ppm = None
     try:
-        # Decode JPEG to PPM using Pillow
-        img = Image.open(input_path)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
+        # Decode JPEG (unless already decoded) to PPM in memory
+        data = _ppm_bytes(_decode_rgb(img_or_path))
         
-        # Save as temporary PPM (cjpeg can read this)
-        temp_ppm = Path(output_path).with_suffix('.tmp.ppm')
-        img.save(temp_ppm, 'PPM')
-        
-        # Encode with mozjpeg
+        # Encode with mozjpeg, feeding the PPM through stdin
         cmd = [
             cjpeg,
             '-quality', str(quality),
             '-optimize',
-            '-outfile', str(output_path),
-            str(temp_ppm)
+            '-outfile', str(output_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        # Clean up temp file
-        if temp_ppm and temp_ppm.exists():
-            temp_ppm.unlink()
+        result = subprocess.run(cmd, input=data,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         
         if result.returncode == 0 and os.path.exists(output_path):
             return True, None
         else:
-            return False, result.stderr.strip() if result.stderr else "Unknown error"
+            return False, result.stderr.decode('utf-8', 'replace').strip() if result.stderr else "Unknown error"
     
     except Exception as e:
-        # Clean up temp file on error
-        if temp_ppm and temp_ppm.exists():
-            try:
-                temp_ppm.unlink()
-            except:
-                pass
         return False, str(e)
 
 
-def compress_jpeg_jpegtran(input_path, output_path):
-    """Lossless JPEG optimization using jpegtran"""
+def compress_jpeg_jpegtran(input_path, output_path, arithmetic=False, scans=None):
+    """
+    Lossless JPEG optimization using jpegtran.
+    arithmetic switches to arithmetic coding (smaller, but not every decoder reads it);
+    scans is a scan script, applied only to 3-component images it is written for.
+    """
     jpegtran = find_jpegtran()
     if not jpegtran:
         return False, "jpegtran not found"
@@ -155,33 +312,34 @@ def compress_jpeg_jpegtran(input_path, output_path):
             '-optimize',
             '-progressive',
             '-copy', 'none',  # Strip metadata
-            '-outfile', str(output_path),
-            str(input_path)
         ]
+        if arithmetic:
+            cmd.append('-arithmetic')
+        if scans:
+            frame = read_jpeg_frame(input_path)
+            if frame is not None and frame[1] == 3:
+                cmd += ['-scans', str(scans)]
+        cmd += ['-outfile', str(output_path), str(input_path)]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         
         if result.returncode == 0 and os.path.exists(output_path):
             return True, None
         else:
-            return False, result.stderr.strip() if result.stderr else "Unknown error"
+            return False, result.stderr.decode('utf-8', 'replace').strip() if result.stderr else "Unknown error"
     
     except Exception as e:
         return False, str(e)
 
 
-def compress_jpeg_pillow(input_path, output_path, quality):
+def compress_jpeg_pillow(img_or_path, output_path, quality):
     """Compress JPEG using Pillow (fallback)"""
     if not PILLOW_AVAILABLE:
         return False, "Pillow not installed"
     
     try:
-        img = Image.open(input_path)
-        
         # Convert to RGB if needed (some JPEGs have different modes)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
+        img = _decode_rgb(img_or_path)
         img.save(output_path, 'JPEG', quality=quality, optimize=True)
         return True, None
     
@@ -189,39 +347,74 @@ def compress_jpeg_pillow(input_path, output_path, quality):
         return False, str(e)
 
 
-def compress_jpeg(input_path, output_path, preset_config, force_pillow=False):
-    """Compress a single JPEG file"""
-    if not os.path.exists(input_path):
-        print(f"ERROR: File not found: {input_path}")
-        return False
+def compress_jpeg_multi(input_path, output_paths, qualities, force_pillow=False):
+    """
+    Encode one JPEG at several qualities from a single decode.
+    Returns (method, [(success, error), ...]) in the order of qualities.
+    """
+    if not PILLOW_AVAILABLE:
+        return None, [(False, "Pillow required for multi-quality compression")] * len(qualities)
     
-    original_size = get_file_size(input_path)
+    cjpeg = None if force_pillow else find_cjpeg()
+    try:
+        img = _decode_rgb(input_path)
+        
+        if not cjpeg:
+            results = []
+            for output_path, quality in zip(output_paths, qualities):
+                try:
+                    img.save(output_path, 'JPEG', quality=quality, optimize=True)
+                    results.append((True, None))
+                except Exception as e:
+                    results.append((False, str(e)))
+            return "Pillow", results
+        
+        data = _ppm_bytes(img)
+    except Exception as e:
+        return None, [(False, str(e))] * len(qualities)
     
-    # Determine compression method
-    if preset_config['quality'] is None:
-        # Lossless preset - use jpegtran
-        method = "jpegtran"
-        success, error = compress_jpeg_jpegtran(input_path, output_path)
-    elif force_pillow:
-        # Forced Pillow usage
-        method = "Pillow"
-        success, error = compress_jpeg_pillow(input_path, output_path, preset_config['quality'])
-    else:
-        # Try mozjpeg first, fallback to Pillow
-        cjpeg = find_cjpeg()
-        if cjpeg:
-            method = "mozjpeg"
-            success, error = compress_jpeg_mozjpeg(input_path, output_path, preset_config['quality'])
-        elif PILLOW_AVAILABLE:
-            method = "Pillow"
-            success, error = compress_jpeg_pillow(input_path, output_path, preset_config['quality'])
+    # Start every encoder first, then feed them the same PPM so they run in parallel
+    procs = []
+    for output_path, quality in zip(output_paths, qualities):
+        cmd = [
+            cjpeg,
+            '-quality', str(quality),
+            '-optimize',
+            '-outfile', str(output_path)
+        ]
+        try:
+            procs.append(subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE))
+        except OSError as e:
+            procs.append(e)
+    
+    for proc in procs:
+        if isinstance(proc, OSError):
+            continue
+        try:
+            proc.stdin.write(data)
+        except BrokenPipeError:
+            pass
+        proc.stdin.close()
+    
+    results = []
+    for proc, output_path in zip(procs, output_paths):
+        if isinstance(proc, OSError):
+            results.append((False, str(proc)))
+            continue
+        err = proc.stderr.read()
+        proc.stderr.close()
+        if proc.wait() == 0 and os.path.exists(output_path):
+            results.append((True, None))
         else:
-            print(f"✗ {input_path}")
-            print(f"  No compression tool available (install mozjpeg, jpegtran, or pillow)")
-            return False
-    
+            results.append((False, err.decode('utf-8', 'replace').strip() if err else "Unknown error"))
+    return "mozjpeg", results
+
+
+def _report(label, output_path, original_size, method, success, error):
+    """Print the outcome of one encode and drop outputs that failed or grew"""
     if not success:
-        print(f"✗ {input_path}")
+        print(f"✗ {label}")
         print(f"  Compression failed ({method}): {error}")
         # Clean up failed output
         if os.path.exists(output_path):
@@ -232,23 +425,146 @@ def compress_jpeg(input_path, output_path, preset_config, force_pillow=False):
         return False
     
     # Check if compression was actually beneficial
-    if os.path.exists(output_path):
-        compressed_size = get_file_size(output_path)
-        
-        if compressed_size < original_size:
-            reduction = ((original_size - compressed_size) / original_size) * 100
-            print(f"✓ {input_path}")
-            print(f"  {format_size(original_size)} → {format_size(compressed_size)} "
-                  f"({reduction:.1f}% smaller) [{method}]")
-            return True
-        else:
-            # Compressed file is larger or same, remove it
-            os.remove(output_path)
-            print(f"⊘ {input_path}")
-            print(f"  Already optimized or would be larger")
+    try:
+        compressed_size = os.stat(output_path).st_size
+    except FileNotFoundError:
+        return False
+    
+    if compressed_size < original_size:
+        reduction = ((original_size - compressed_size) / original_size) * 100
+        print(f"✓ {label}")
+        print(f"  {format_size(original_size)} → {format_size(compressed_size)} "
+              f"({reduction:.1f}% smaller) [{method}]")
+        return True
+    else:
+        # Compressed file is larger or same, remove it
+        os.remove(output_path)
+        print(f"⊘ {label}")
+        print(f"  Already optimized or would be larger")
+        return False
+
+
+def _skip_reason(input_path, original_size, quality, min_size):
+    """
+    Why a file is not worth re-encoding at all, or None.
+    quality is the lossy target, None when the file only gets a lossless repack.
+    """
+    if original_size < min_size:
+        return f"Smaller than {format_size(min_size)}, skipped"
+    if quality is None:
+        return None
+    if original_size < min_size * PROGRESSIVE_SKIP_FACTOR and is_progressive_jpeg(input_path):
+        return "Already progressive and small, skipped"
+    source_quality = estimate_jpeg_quality(input_path)
+    if source_quality is not None and source_quality <= quality - QUALITY_SKIP_MARGIN:
+        return f"Already at target quality (~{source_quality})"
+    return None
+
+
+def _uses_jpegtran(quality, fast_highq, force_pillow):
+    """
+    Whether a file goes through a lossless jpegtran repack instead of a re-encode:
+    the lossless preset, or a near-lossless --fast-highq target when jpegtran is installed
+    """
+    return quality is None or bool(fast_highq and not force_pillow
+                                   and quality >= FAST_HIGHQ_THRESHOLD and available_tools()[1])
+
+
+def compress_jpeg(input_path, output_path, preset_config, force_pillow=False, fast_highq=False,
+                  min_size=0, arithmetic=False, scans=None):
+    """Compress a single JPEG file"""
+    try:
+        original_size = os.stat(input_path).st_size
+    except FileNotFoundError:
+        print(f"ERROR: File not found: {input_path}")
+        return False
+    
+    quality = preset_config.quality
+    repack = _uses_jpegtran(quality, fast_highq, force_pillow)
+    
+    # Skip files that are unlikely to shrink before paying for a decode
+    reason = _skip_reason(input_path, original_size, None if repack else quality, min_size)
+    if reason:
+        print(f"⊘ {input_path}")
+        print(f"  {reason}")
+        return False
+    
+    # Determine compression method
+    if repack:
+        method = "jpegtran"
+        success, error = compress_jpeg_jpegtran(input_path, output_path, arithmetic, scans)
+    else:
+        cjpeg, _, pillow = available_tools()
+        if not pillow:
+            print(f"✗ {input_path}")
+            if cjpeg:
+                print(f"  Pillow required for mozjpeg compression")
+            else:
+                print(f"  No compression tool available (install mozjpeg, jpegtran, or pillow)")
             return False
+        
+        # Decode once and hand the pixels to whichever encoder runs
+        try:
+            img = _decode_rgb(input_path)
+        except Exception as e:
+            return _report(input_path, output_path, original_size, "Pillow", False, str(e))
+        
+        # Try mozjpeg first (unless Pillow is forced), fallback to Pillow
+        success = False
+        if cjpeg and not force_pillow:
+            method = "mozjpeg"
+            success, error = compress_jpeg_mozjpeg(img, output_path, quality)
+            if not success:
+                print(f"WARNING: mozjpeg failed for {input_path} ({error}), retrying with Pillow")
+        if not success:
+            method = "Pillow"
+            success, error = compress_jpeg_pillow(img, output_path, quality)
+    
+    return _report(input_path, output_path, original_size, method, success, error)
+
+
+def compress_jpeg_qualities(input_path, qualities, force_pillow=False):
+    """Compress a single JPEG at several qualities, writing name-qNN.jpg next to it"""
+    try:
+        original_size = os.stat(input_path).st_size
+    except FileNotFoundError:
+        print(f"ERROR: File not found: {input_path}")
+        return False
+    path = Path(input_path)
+    output_paths = [str(path.with_stem(f"{path.stem}-q{quality}")) for quality in qualities]
+    
+    method, results = compress_jpeg_multi(input_path, output_paths, qualities, force_pillow)
+    if method is None:
+        print(f"✗ {input_path}")
+        print(f"  No compression tool available: {results[0][1]}")
+        return False
     
-    return False
+    ok = False
+    for output_path, (success, error) in zip(output_paths, results):
+        ok |= _report(output_path, output_path, original_size, method, success, error)
+    return ok
+
+
+def _walk(root, exts):
+    """Yield files under root whose lowercased extension is in exts"""
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            # Unreadable directory: skip it, as rglob does
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) or (
+                        # Only symlinks pay for a stat to see what they point at
+                        entry.is_symlink() and entry.is_file()):
+                    name = entry.name
+                    dot = name.rfind('.')
+                    if dot >= 0 and name[dot:].lower() in exts:
+                        yield Path(entry.path)
 
 
 def find_jpeg_files(paths):
@@ -259,31 +575,162 @@ def find_jpeg_files(paths):
     for path_str in paths:
         path = Path(path_str)
         
-        if not path.exists():
+        # One real stat per user-supplied path; the walk below relies on d_type
+        try:
+            mode = os.stat(path_str).st_mode
+        except OSError:
             print(f"WARNING: Path does not exist: {path_str}")
             continue
         
-        if path.is_file():
+        if stat.S_ISREG(mode):
             if path.suffix.lower() in jpeg_exts:
                 jpeg_files.append(path)
             else:
                 print(f"WARNING: Not a JPEG file: {path_str}")
-        elif path.is_dir():
-            # Recursively find all JPEG files
-            for ext in jpeg_exts:
-                jpeg_files.extend(path.rglob(f'*{ext}'))
-                jpeg_files.extend(path.rglob(f'*{ext.upper()}'))
+        elif stat.S_ISDIR(mode):
+            # Recursively find all JPEG files in a single walk
+            jpeg_files.extend(_walk(path, jpeg_exts))
     
     return sorted(set(jpeg_files))
 
 
+def _process_one(task):
+    """
+    Compress one JPEG in a worker process.
+    Returns (path, success, captured output).
+    """
+    jpeg_file, preset_config, opts = task
+    encode_opts = {key: opts[key] for key in ('force_pillow', 'fast_highq', 'min_size',
+                                              'arithmetic', 'scans')}
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        if opts['qualities']:
+            ok = compress_jpeg_qualities(str(jpeg_file), opts['qualities'], opts['force_pillow'])
+        elif opts['overwrite']:
+            # Use temporary file then replace original
+            temp_output = jpeg_file.with_suffix('.tmp.jpg')
+            ok = compress_jpeg(str(jpeg_file), str(temp_output), preset_config, **encode_opts)
+            if ok:
+                # Replace original with compressed version
+                os.replace(temp_output, jpeg_file)
+            elif temp_output.exists():
+                # Clean up temp file if it exists
+                temp_output.unlink()
+        else:
+            # Create new file with suffix
+            output_path = jpeg_file.with_stem(jpeg_file.stem + opts['suffix'])
+            ok = compress_jpeg(str(jpeg_file), str(output_path), preset_config, **encode_opts)
+    return jpeg_file, ok, buf.getvalue()
+
+
+async def encode_file(input_path, output_path, quality, sem):
+    """
+    Encode one JPEG with a cjpeg asyncio subprocess, decoding in a worker thread
+    and retrying with Pillow if cjpeg fails.
+    Returns (method, success, error, mozjpeg error if it fell back).
+    """
+    async with sem:
+        loop = asyncio.get_running_loop()
+        try:
+            # Pillow releases the GIL while decoding, so threads overlap with the encoders
+            img = await loop.run_in_executor(None, _decode_rgb, input_path)
+        except Exception as e:
+            return "Pillow", False, str(e), None
+        
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                find_cjpeg(),
+                '-quality', str(quality),
+                '-optimize',
+                '-outfile', str(output_path),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            _, err = await proc.communicate(_ppm_bytes(img))
+            if proc.returncode == 0 and os.path.exists(output_path):
+                return "mozjpeg", True, None, None
+            mozjpeg_error = err.decode('utf-8', 'replace').strip() if err else "Unknown error"
+        except Exception as e:
+            mozjpeg_error = str(e)
+        
+        # Fall back to Pillow with the pixels already decoded, still counted against -j
+        success, error = await loop.run_in_executor(
+            None, compress_jpeg_pillow, img, str(output_path), quality)
+        return "Pillow", success, error, mozjpeg_error
+
+
+async def _process_one_async(task, sem):
+    """
+    Compress one JPEG on the event loop (mozjpeg path only).
+    Returns (path, success, captured output) like _process_one.
+    """
+    jpeg_file, preset_config, opts = task
+    quality = preset_config.quality
+    if opts['overwrite']:
+        output_path = jpeg_file.with_suffix('.tmp.jpg')
+    else:
+        output_path = jpeg_file.with_stem(jpeg_file.stem + opts['suffix'])
+    
+    # Printing happens only in synchronous stretches, so redirecting stdout is safe here
+    buf = io.StringIO()
+    try:
+        original_size = os.stat(jpeg_file).st_size
+    except FileNotFoundError:
+        return jpeg_file, False, f"ERROR: File not found: {jpeg_file}\n"
+    
+    reason = _skip_reason(str(jpeg_file), original_size, quality, opts['min_size'])
+    if reason:
+        return jpeg_file, False, f"⊘ {jpeg_file}\n  {reason}\n"
+    
+    method, success, error, mozjpeg_error = await encode_file(
+        str(jpeg_file), output_path, quality, sem)
+    
+    with contextlib.redirect_stdout(buf):
+        if mozjpeg_error:
+            print(f"WARNING: mozjpeg failed for {jpeg_file} ({mozjpeg_error}), retrying with Pillow")
+        ok = _report(str(jpeg_file), str(output_path), original_size, method, success, error)
+    
+    if opts['overwrite']:
+        if ok:
+            # Replace original with compressed version
+            os.replace(output_path, jpeg_file)
+        elif output_path.exists():
+            # Clean up temp file if it exists
+            output_path.unlink()
+    return jpeg_file, ok, buf.getvalue()
+
+
+async def _run_async(tasks, workers, emit):
+    """Run tasks on one event loop with at most `workers` encodes in flight"""
+    sem = asyncio.Semaphore(workers)
+    for result in asyncio.as_completed([_process_one_async(task, sem) for task in tasks]):
+        emit(*await result)
+
+
+def _size_or_zero(path):
+    """File size for scheduling, 0 if it can no longer be read"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _encode_batch(batch):
+    """
+    Compress a batch of files in one worker task, saving a pickling/IPC round trip per file.
+    Returns the _process_one results in batch order.
+    """
+    return [_process_one(task) for task in batch]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='TinyJPG CLI - Compress JPEG images using mozjpeg/jpegtran',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=f"""
 Presets:
-{chr(10).join(f"  {name:10} - {info['description']}" for name, info in PRESETS.items())}
+{chr(10).join(f"  {name:10} - {info.description}" for name, info in PRESETS.items())}
 
 Tools priority:
   Lossy:    mozjpeg (best) > Pillow (fallback)
@@ -295,6 +742,12 @@ Examples:
   python tinyjpg_cli.py *.jpg -o
   python tinyjpg_cli.py photos/ -p high
   python tinyjpg_cli.py image.jpg -s -compressed
+  python tinyjpg_cli.py photos/ -j 4
+  python tinyjpg_cli.py image.jpg --qualities 75,84,90
+  python tinyjpg_cli.py photos/ -q 95 --fast-highq
+  python tinyjpg_cli.py photos/ --min-size 0
+  python tinyjpg_cli.py photos/ -p lossless --scans --arithmetic
+  python tinyjpg_cli.py photos/ --asyncio -j 8
         """
     )
     
@@ -312,9 +765,40 @@ Examples:
     parser.add_argument('-q', '--quality',
                         type=int,
                         help='Override quality (1-100, ignored for lossless preset)')
+    parser.add_argument('--qualities',
+                        help='Comma-separated qualities to encode side by side (e.g. 75,84,90), '
+                             'writes name-q75.jpg etc.; overrides preset, -o and -s')
+    parser.add_argument('--fast-highq',
+                        action='store_true',
+                        help=f'For quality >= {FAST_HIGHQ_THRESHOLD}, only optimize losslessly with jpegtran '
+                             f'instead of re-encoding (much faster, typically ~5-10%% smaller)')
+    parser.add_argument('--min-size',
+                        type=int,
+                        default=DEFAULT_MIN_SIZE,
+                        metavar='BYTES',
+                        help=f'Skip files smaller than this, and small progressive files for lossy presets '
+                             f'(default: {DEFAULT_MIN_SIZE}, 0 disables)')
+    parser.add_argument('--arithmetic',
+                        action='store_true',
+                        help='Use arithmetic coding in jpegtran output (smaller, but some '
+                             'browsers and viewers cannot decode it)')
+    parser.add_argument('--scans',
+                        action='store_true',
+                        help='Use a progressive scan script in jpegtran output (see --scans-file)')
+    parser.add_argument('--scans-file',
+                        default=str(DEFAULT_SCANS_FILE),
+                        metavar='FILE',
+                        help='Scan script used by --scans (default: jpegtran_scans.txt next to this script)')
     parser.add_argument('--pillow',
                         action='store_true',
                         help='Force use of Pillow instead of mozjpeg')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        help='Number of files to compress in parallel (default: CPU count)')
+    parser.add_argument('--asyncio',
+                        action='store_true',
+                        help='Run mozjpeg encodes as asyncio subprocesses from a single Python '
+                             'process instead of a process pool (lossy presets only)')
     parser.add_argument('--list-presets',
                         action='store_true',
                         help='List all available presets and exit')
@@ -327,16 +811,15 @@ Examples:
         for name, info in PRESETS.items():
             default_marker = " (default)" if name == DEFAULT_PRESET else ""
             print(f"\n  {name}{default_marker}")
-            print(f"    {info['description']}")
-            if info['quality'] is not None:
-                print(f"    Quality: {info['quality']}")
+            print(f"    {info.description}")
+            if info.quality is not None:
+                print(f"    Quality: {info.quality}")
             else:
                 print(f"    Method: Lossless (jpegtran)")
         
         # Show available tools
         print("\nAvailable compression tools:")
-        cjpeg = find_cjpeg()
-        jpegtran = find_jpegtran()
+        cjpeg, jpegtran, _ = available_tools()
         print(f"  mozjpeg (cjpeg):  {'✓ Found' if cjpeg else '✗ Not found'}")
         print(f"  jpegtran:         {'✓ Found' if jpegtran else '✗ Not found'}")
         print(f"  Pillow:           {'✓ Available' if PILLOW_AVAILABLE else '✗ Not installed'}")
@@ -364,14 +847,53 @@ Examples:
         print("Install Pillow: pip install pillow")
     
     # Get preset configuration
-    preset_config = PRESETS[args.preset].copy()
+    preset_config = PRESETS[args.preset]
     
     # Override quality if specified
     if args.quality is not None:
         if args.preset == 'lossless':
             print("WARNING: --quality ignored for lossless preset")
         else:
-            preset_config['quality'] = args.quality
+            preset_config = replace(preset_config, quality=args.quality)
+    
+    qualities = None
+    if args.qualities:
+        try:
+            qualities = sorted({int(q) for q in args.qualities.split(',') if q.strip()})
+        except ValueError:
+            print(f"ERROR: Invalid --qualities value: {args.qualities}")
+            sys.exit(1)
+        if not qualities or not all(1 <= q <= 100 for q in qualities):
+            print("ERROR: --qualities must be values between 1 and 100")
+            sys.exit(1)
+        if not PILLOW_AVAILABLE:
+            print("ERROR: --qualities requires Pillow (pip install pillow)")
+            sys.exit(1)
+        if args.overwrite:
+            print("WARNING: --overwrite ignored with --qualities")
+    
+    scans = args.scans_file if args.scans else None
+    if scans and not os.path.isfile(scans):
+        print(f"ERROR: Scan script not found: {scans}")
+        sys.exit(1)
+    
+    # --scans/--arithmetic only reach jpegtran: the lossless preset or --fast-highq repacks
+    if args.scans or args.arithmetic:
+        if qualities or not _uses_jpegtran(preset_config.quality, args.fast_highq, args.pillow):
+            print("WARNING: --scans/--arithmetic only apply to jpegtran (lossless preset or "
+                  f"--fast-highq with quality >= {FAST_HIGHQ_THRESHOLD}), ignored")
+    
+    # The event-loop dispatcher only covers the plain mozjpeg path
+    use_asyncio = args.asyncio
+    if use_asyncio:
+        cjpeg, _, pillow = available_tools()
+        if not (cjpeg and pillow) or preset_config.quality is None or qualities or args.pillow:
+            print("WARNING: --asyncio needs mozjpeg + Pillow and a lossy preset without "
+                  "--qualities/--pillow, using the process pool")
+            use_asyncio = False
+        elif args.fast_highq and preset_config.quality >= FAST_HIGHQ_THRESHOLD:
+            print("WARNING: --asyncio ignored with --fast-highq, using the process pool")
+            use_asyncio = False
     
     # Find all JPEG files
     jpeg_files = find_jpeg_files(args.paths)
@@ -382,8 +904,12 @@ Examples:
     
     # Print summary
     print(f"\nCompressing {len(jpeg_files)} JPEG file(s)")
-    print(f"Preset: {args.preset} - {preset_config['description']}")
-    print(f"Mode: {'OVERWRITE' if args.overwrite else f'CREATE NEW (suffix: {args.suffix})'}")
+    if qualities:
+        print(f"Qualities: {', '.join(str(q) for q in qualities)}")
+        print(f"Mode: CREATE NEW (suffix: -q<quality>)")
+    else:
+        print(f"Preset: {args.preset} - {preset_config.description}")
+        print(f"Mode: {'OVERWRITE' if args.overwrite else f'CREATE NEW (suffix: {args.suffix})'}")
     print("-" * 70)
     print()
     
@@ -391,34 +917,58 @@ Examples:
     success_count = 0
     failed_count = 0
     
-    for jpeg_file in jpeg_files:
-        if args.overwrite:
-            # Use temporary file then replace original
-            temp_output = jpeg_file.with_suffix('.tmp.jpg')
-            if compress_jpeg(str(jpeg_file), str(temp_output), preset_config, args.pillow):
-                # Replace original with compressed version
-                shutil.move(str(temp_output), str(jpeg_file))
-                success_count += 1
-            else:
-                # Clean up temp file if it exists
-                if temp_output.exists():
-                    temp_output.unlink()
-                failed_count += 1
+    opts = {
+        'overwrite': args.overwrite,
+        'suffix': args.suffix,
+        'force_pillow': args.pillow,
+        'fast_highq': args.fast_highq,
+        'min_size': args.min_size,
+        'arithmetic': args.arithmetic,
+        'scans': scans,
+        'qualities': qualities,
+    }
+    tasks = [(jpeg_file, preset_config, opts) for jpeg_file in jpeg_files]
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(tasks)))
+    # Start the largest files first so one big image does not straggle at the end
+    by_size = sorted(tasks, key=lambda task: _size_or_zero(task[0]), reverse=True)
+    
+    # Results are reported in completion order
+    def emit(jpeg_file, ok, output):
+        nonlocal success_count, failed_count
+        print(output, end='')
+        if ok:
+            success_count += 1
         else:
-            # Create new file with suffix
-            output_path = jpeg_file.with_stem(jpeg_file.stem + args.suffix)
-            if compress_jpeg(str(jpeg_file), str(output_path), preset_config, args.pillow):
-                success_count += 1
-            else:
-                failed_count += 1
+            failed_count += 1
         
         print()
     
+    if use_asyncio:
+        asyncio.run(_run_async(by_size, workers, emit))
+    elif workers > 1:
+        # Batch only long runs: keep several batches per worker so idle workers
+        # keep pulling work, and deal files round-robin so the largest ones spread
+        # across batches instead of piling into the first
+        batch_size = max(1, min(BATCH_SIZE, len(tasks) // (workers * BATCHES_PER_WORKER)))
+        batch_count = -(-len(tasks) // batch_size)
+        batches = [by_size[i::batch_count] for i in range(batch_count)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(_encode_batch, batch) for batch in batches]
+            # Report each batch as soon as it finishes
+            for future in as_completed(futures):
+                for result in future.result():
+                    emit(*result)
+    else:
+        for task in tasks:
+            emit(*_process_one(task))
+    
     # Print final summary
     print("-" * 70)
     print(f"Completed: {success_count} successful, {failed_count} failed/skipped")
 
 
 if __name__ == '__main__':
+    freeze_support()
     main()
 
@@ -5,9 +5,16 @@ A simple script to compress PNG images with quality presets
 """
 
 import argparse
+import contextlib
+import io
 import os
-import sys
 import shutil
+import stat
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from multiprocessing import freeze_support
 from pathlib import Path
 
 try:
@@ -52,53 +59,98 @@ PRESETS = {
 }
 
 DEFAULT_PRESET = 'balanced'
+PNG_EXTS = {'.png'}
 
 
-def get_file_size(filepath):
-    """Get file size in bytes"""
-    return os.path.getsize(filepath)
+UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 
 def format_size(bytes_size):
     """Format bytes to human readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.2f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.2f} TB"
+    # Unit index straight from the bit length (exact integer log2), capped at TB
+    i = min((max(int(bytes_size), 1).bit_length() - 1) // 10, len(UNITS) - 1)
+    return f"{bytes_size / (1 << (10 * i)):.2f} {UNITS[i]}"
+
+
+@lru_cache(maxsize=1)
+def find_pngquant():
+    """Find the pngquant binary on PATH"""
+    return shutil.which('pngquant')
+
+
+# Last settings handed to the pngquant wrapper, so batches configure it once
+_LAST_CFG = None
+
+
+def _ensure_cfg(cfg):
+    """Configure the pngquant wrapper only when the settings change"""
+    global _LAST_CFG
+    if cfg != _LAST_CFG:
+        pngquant.config(**cfg)
+        _LAST_CFG = cfg
+
+
+def _compress_png_direct(input_path, output_path, preset_config):
+    """Compress PNG by running the pngquant binary directly"""
+    cmd = [
+        find_pngquant(),
+        '--quality', f"{preset_config['min_quality']}-{preset_config['max_quality']}",
+        '--speed', str(preset_config['speed']),
+        '--force',
+        '--output', str(output_path),
+        '--', str(input_path)
+    ]
+    
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    
+    if result.returncode == 0:
+        return True, None
+    elif result.returncode == 99:
+        # pngquant's "quality too low" exit status
+        return False, "Could not compress to desired quality"
+    else:
+        return False, (result.stderr.decode('utf-8', 'replace').strip()
+                       or f"pngquant exited with code {result.returncode}")
 
 
 def compress_png(input_path, output_path, preset_config, overwrite=False):
-    """Compress a single PNG file using pngquant Python wrapper"""
-    if not os.path.exists(input_path):
+    """Compress a single PNG file using pngquant (binary if on PATH, else Python wrapper)"""
+    # Get original size
+    try:
+        original_size = os.stat(input_path).st_size
+    except FileNotFoundError:
         print(f"ERROR: File not found: {input_path}")
         return False
     
-    # Get original size
-    original_size = get_file_size(input_path)
-    
     try:
-        # Configure pngquant with preset settings
-        pngquant.config(
-            min_quality=preset_config['min_quality'],
-            max_quality=preset_config['max_quality'],
-            speed=preset_config['speed']
-        )
-        
-        # Compress the image
-        # If overwrite=True, we use the same path temporarily then replace
-        # quant_image returns True on success, False on failure
-        result = pngquant.quant_image(
-            image=input_path,
-            dst=output_path,
-            override=True,
-            delete=False  # Don't delete the original yet
-        )
+        if find_pngquant():
+            result, error = _compress_png_direct(input_path, output_path, preset_config)
+        else:
+            # Configure pngquant with preset settings
+            _ensure_cfg({
+                'min_quality': preset_config['min_quality'],
+                'max_quality': preset_config['max_quality'],
+                'speed': preset_config['speed'],
+            })
+            
+            # Compress the image
+            # If overwrite=True, we use the same path temporarily then replace
+            # quant_image returns True on success, False on failure
+            result = pngquant.quant_image(
+                image=input_path,
+                dst=output_path,
+                override=True,
+                delete=False  # Don't delete the original yet
+            )
+            error = "Could not compress to desired quality"
         
         # Check if compression was successful and output exists
-        if result and os.path.exists(output_path):
-            compressed_size = get_file_size(output_path)
-            
+        try:
+            compressed_size = os.stat(output_path).st_size if result else None
+        except FileNotFoundError:
+            compressed_size = None
+        
+        if compressed_size is not None:
             # Check if the compressed file is actually smaller
             if compressed_size < original_size:
                 reduction = ((original_size - compressed_size) / original_size) * 100
@@ -109,14 +161,13 @@ def compress_png(input_path, output_path, preset_config, overwrite=False):
                 return True
             else:
                 # Compressed file is larger, remove it
-                if os.path.exists(output_path):
-                    os.remove(output_path)
+                os.remove(output_path)
                 print(f"⊘ {input_path}")
                 print(f"  Already optimized or would be larger")
                 return False
         else:
             print(f"✗ {input_path}")
-            print(f"  Could not compress to desired quality")
+            print(f"  {error}")
             return False
             
     except Exception as e:
@@ -131,6 +182,28 @@ def compress_png(input_path, output_path, preset_config, overwrite=False):
         return False
 
 
+def _walk(root, exts):
+    """Yield files under root whose lowercased extension is in exts"""
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            # Unreadable directory: skip it, as rglob does
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) or (
+                        # Only symlinks pay for a stat to see what they point at
+                        entry.is_symlink() and entry.is_file()):
+                    name = entry.name
+                    dot = name.rfind('.')
+                    if dot >= 0 and name[dot:].lower() in exts:
+                        yield Path(entry.path)
+
+
 def find_png_files(paths):
     """Find all PNG files from given paths (files or directories)"""
     png_files = []
@@ -138,23 +211,58 @@ def find_png_files(paths):
     for path_str in paths:
         path = Path(path_str)
         
-        if not path.exists():
+        # One real stat per user-supplied path; the walk below relies on d_type
+        try:
+            mode = os.stat(path_str).st_mode
+        except OSError:
             print(f"WARNING: Path does not exist: {path_str}")
             continue
-            
-        if path.is_file():
-            if path.suffix.lower() in ['.png']:
+        
+        if stat.S_ISREG(mode):
+            if path.suffix.lower() in PNG_EXTS:
                 png_files.append(path)
             else:
                 print(f"WARNING: Not a PNG file: {path_str}")
-        elif path.is_dir():
-            # Recursively find all PNG files
-            png_files.extend(path.rglob('*.png'))
-            png_files.extend(path.rglob('*.PNG'))
+        elif stat.S_ISDIR(mode):
+            # Recursively find all PNG files in a single walk
+            png_files.extend(_walk(path, PNG_EXTS))
     
     return sorted(set(png_files))
 
 
+def _process_one(task):
+    """
+    Compress one PNG in a worker process.
+    Returns (path, success, captured output).
+    """
+    png_file, preset_config, overwrite, suffix = task
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        if overwrite:
+            # Use temporary file then replace original
+            temp_output = png_file.with_suffix('.tmp.png')
+            ok = compress_png(str(png_file), str(temp_output), preset_config, overwrite=True)
+            if ok:
+                # Replace original with compressed version
+                os.replace(temp_output, png_file)
+            elif temp_output.exists():
+                # Clean up temp file if it exists
+                temp_output.unlink()
+        else:
+            # Create new file with suffix
+            output_path = png_file.with_stem(png_file.stem + suffix)
+            ok = compress_png(str(png_file), str(output_path), preset_config, overwrite=False)
+    return png_file, ok, buf.getvalue()
+
+
+def _size_or_zero(path):
+    """File size for scheduling, 0 if it can no longer be read"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='TinyPNG-ish CLI - Compress PNG images using pngquant',
@@ -169,6 +277,7 @@ Examples:
   python tinypng_cli.py *.png --overwrite
   python tinypng_cli.py images/ --preset web
   python tinypng_cli.py img1.png img2.png folder/ --suffix -compressed
+  python tinypng_cli.py images/ --jobs 4
         """
     )
     
@@ -183,6 +292,9 @@ Examples:
     parser.add_argument('--suffix', '-s',
                         default='-min',
                         help='Suffix for output files when not overwriting (default: -min)')
+    parser.add_argument('--jobs', '-j',
+                        type=int,
+                        help='Number of files to compress in parallel (default: CPU count)')
     parser.add_argument('--list-presets',
                         action='store_true',
                         help='List all available presets and exit')
@@ -220,34 +332,37 @@ Examples:
     success_count = 0
     failed_count = 0
     
-    for png_file in png_files:
-        if args.overwrite:
-            # Use temporary file then replace original
-            temp_output = png_file.with_suffix('.tmp.png')
-            if compress_png(str(png_file), str(temp_output), preset_config, overwrite=True):
-                # Replace original with compressed version
-                shutil.move(str(temp_output), str(png_file))
-                success_count += 1
-            else:
-                # Clean up temp file if it exists
-                if temp_output.exists():
-                    temp_output.unlink()
-                failed_count += 1
+    tasks = [(png_file, preset_config, args.overwrite, args.suffix) for png_file in png_files]
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(tasks)))
+    
+    def emit(png_file, ok, output):
+        nonlocal success_count, failed_count
+        print(output, end='')
+        if ok:
+            success_count += 1
         else:
-            # Create new file with suffix
-            output_path = png_file.with_stem(png_file.stem + args.suffix)
-            if compress_png(str(png_file), str(output_path), preset_config, overwrite=False):
-                success_count += 1
-            else:
-                failed_count += 1
+            failed_count += 1
         
         print()
     
+    if workers > 1:
+        # Start the largest files first so one big image does not straggle at the end
+        by_size = sorted(tasks, key=lambda task: _size_or_zero(task[0]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(_process_one, task) for task in by_size]
+            # Report each file as soon as it finishes
+            for future in as_completed(futures):
+                emit(*future.result())
+    else:
+        for task in tasks:
+            emit(*_process_one(task))
+    
     # Print final summary
     print("-" * 70)
     print(f"Completed: {success_count} successful, {failed_count} failed/skipped")
 
 
 if __name__ == '__main__':
+    freeze_support()
     main()
 